@@ -0,0 +1,40 @@
+"""Move closed months of attendance out of the attendance table into the columnar archive.
+
+    python archive.py                    # every closed month
+    python archive.py --before 2025-01   # only months before January 2025
+
+Archived months are stored under ATTENDANCE_ARCHIVE_DIR as per-month NumPy
+columns and read from there by the monthly report, calendar and chatbot. Their
+rows keep their ids, so /attendance still lists them and they can still be
+corrected or deleted. Running it again also picks up rows that reached an
+archived month after it was archived.
+"""
+import argparse
+import sys
+from datetime import date
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed months of attendance.")
+    parser.add_argument('--before', help="Only archive months before this one (YYYY-MM)")
+    args = parser.parse_args()
+
+    before = None
+    if args.before:
+        try:
+            year, month = (int(part) for part in args.before.split('-'))
+            before = date(year, month, 1)
+        except ValueError:
+            sys.exit("error: --before must be a month as YYYY-MM")
+
+    from app import app, archive_closed_months
+
+    with app.app_context():
+        moved = archive_closed_months(before)
+    for month_start, count in moved:
+        print(f"{month_start:%Y-%m}: archived {count} records")
+    print(f"Archived {sum(count for _, count in moved)} records from {len(moved)} months")
+
+
+if __name__ == '__main__':
+    main()
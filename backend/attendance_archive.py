@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+
+
+def to_epoch_seconds(timestamps):
+    """Whole seconds since 1970-01-01 of naive (local wall-clock) datetimes, as int64."""
+    return np.array(timestamps, dtype='datetime64[us]').astype(np.int64) // 1_000_000
+
+
+def epoch_seconds(moment):
+    # A naive datetime, or a date's midnight, in the same units as the archived timestamps
+    if not isinstance(moment, datetime):
+        moment = datetime(moment.year, moment.month, moment.day)
+    return int((moment - EPOCH).total_seconds())
+
+
+def to_datetimes(seconds):
+    return np.asarray(seconds).astype('datetime64[s]').astype(object).tolist()
+
+
+def to_isoformat(seconds):
+    # Same text as datetime.isoformat() for whole seconds
+    return np.datetime_as_string(np.asarray(seconds).astype('datetime64[s]')).tolist()
+
+
+def summarize_by_user(user_ids, timestamps):
+    """Per-user totals for rows sorted by user and then time.
+
+    Returns ``(user_ids, days_present, records, first, last)`` arrays with one
+    entry per user, where ``days_present`` counts distinct days.
+    """
+    if not len(user_ids):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty, empty
+    new_user = np.r_[True, user_ids[1:] != user_ids[:-1]]
+    starts = np.flatnonzero(new_user)
+    records = np.diff(np.r_[starts, len(user_ids)])
+    days = timestamps // SECONDS_PER_DAY
+    new_day = new_user | np.r_[True, days[1:] != days[:-1]]
+    days_present = np.add.reduceat(new_day.astype(np.int64), starts)
+    return user_ids[starts], days_present, records, timestamps[starts], timestamps[starts + records - 1]
+
+
+def count_by_day(user_ids, timestamps):
+    """``(user_id, day, records)`` for rows sorted by user and then time."""
+    if not len(user_ids):
+        return []
+    days = timestamps // SECONDS_PER_DAY
+    starts = np.flatnonzero(np.r_[True, (user_ids[1:] != user_ids[:-1]) | (days[1:] != days[:-1])])
+    records = np.diff(np.r_[starts, len(user_ids)])
+    return [
+        (int(user_id), EPOCH_DATE + timedelta(days=int(day)), int(count))
+        for user_id, day, count in zip(user_ids[starts], days[starts], records)
+    ]
+
+
+class AttendanceArchive:
+    """Closed months of attendance as column files, memory-mapped on read.
+
+    Each month lives in ``<root>/YYYY-MM.r<revision>/`` as ``id.npy`` (int64,
+    the rows' attendance ids), ``user_id.npy`` (int32) and ``timestamp.npy``
+    (int64 seconds since 1970-01-01 of the local wall-clock time), sorted by
+    user and then time so that one user's rows are a contiguous slice. A month is never modified in place: changes are written
+    as a new revision, and the caller records which revision is current.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def _path(self, month_start, revision):
+        return os.path.join(self.root, f"{month_start:%Y-%m}.r{revision}")
+
+    def write(self, month_start, record_ids, user_ids, timestamps, revision):
+        """Write a month's rows, in any order, as ``revision``. Returns the row count.
+
+        The files are synced to disk before this returns, so the rows can then
+        be deleted from the database.
+        """
+        record_ids = np.asarray(record_ids, dtype=np.int64)
+        user_ids = np.asarray(user_ids, dtype=np.int32)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        order = np.lexsort((timestamps, user_ids))
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        try:
+            _save(os.path.join(staging, 'id.npy'), record_ids[order])
+            _save(os.path.join(staging, 'user_id.npy'), user_ids[order])
+            _save(os.path.join(staging, 'timestamp.npy'), timestamps[order])
+            path = self._path(month_start, revision)
+            # Left behind by an earlier attempt whose database commit failed
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(staging, path)
+            _fsync_directory(self.root)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return len(order)
+
+    def columns(self, month_start, revision):
+        """``(user_ids, timestamps)`` of a month, memory-mapped once per process."""
+        return self._load(month_start, revision)[1:]
+
+    def record_ids(self, month_start, revision):
+        # Aligned with columns(); not sorted
+        return self._load(month_start, revision)[0]
+
+    def _load(self, month_start, revision):
+        key = (month_start, revision)
+        with self._lock:
+            columns = self._columns.get(key)
+        if columns is None:
+            path = self._path(month_start, revision)
+            columns = (np.load(os.path.join(path, 'id.npy'), mmap_mode='r'),
+                       np.load(os.path.join(path, 'user_id.npy'), mmap_mode='r'),
+                       np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='r'))
+            with self._lock:
+                for stale in [cached for cached in self._columns if cached[0] == month_start]:
+                    del self._columns[stale]
+                self._columns[key] = columns
+        return columns
+
+    def user_timestamps(self, month_start, revision, user_id):
+        user_ids, timestamps = self.columns(month_start, revision)
+        start, stop = np.searchsorted(user_ids, [user_id, user_id + 1])
+        return timestamps[start:stop]
+
+    def remove_old_revisions(self, month_start, revision):
+        # Keep the previous revision: a reader that looked the month up just before the
+        # new one was committed may still be about to open it
+        prefix = f"{month_start:%Y-%m}.r"
+        for name in os.listdir(self.root):
+            if name.startswith(prefix) and int(name[len(prefix):]) < revision - 1:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def _save(path, array):
+    with open(path, 'wb') as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
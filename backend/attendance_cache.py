@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+class TodayAttendanceCache:
+    """Per-process record of the users already marked present today.
+
+    Entries hold the time of the mark and the user summary returned to kiosks,
+    so a repeat recognition can answer ``already_marked`` without touching the
+    database. The cache empties itself when the day changes. Writes made by
+    other processes are picked up by re-reading the data versions returned by
+    ``versions`` at most every ``revalidate_seconds``; if they moved, the
+    cache is cleared.
+    """
+
+    def __init__(self, versions, revalidate_seconds=5):
+        self.versions = versions
+        self.revalidate_seconds = revalidate_seconds
+        self._day = None
+        self._entries = {}
+        self._known_versions = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, today):
+        """Return ``(marked_at, user_data)`` if ``user_id`` is known to be marked on ``today``."""
+        self._revalidate(today)
+        with self._lock:
+            return self._entries.get(user_id)
+
+    def add(self, user_id, today, marked_at, user_data):
+        with self._lock:
+            if self._day != today:
+                self._reset(today)
+            self._entries[user_id] = (marked_at, user_data)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._known_versions = None
+
+    def _revalidate(self, today):
+        now = time.monotonic()
+        with self._lock:
+            if self._day != today:
+                self._reset(today)
+            if self._known_versions is not None and now - self._checked_at < self.revalidate_seconds:
+                return
+        versions = self.versions()
+        with self._lock:
+            if versions != self._known_versions:
+                self._entries.clear()
+                self._known_versions = versions
+            self._checked_at = now
+
+    def _reset(self, today):
+        self._day = today
+        self._entries.clear()
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceWriteError(Exception):
+    """Raised when accepted attendance marks could not be committed."""
+
+    status_code = 503
+
+
+class AttendanceWriter:
+    """Write-behind queue that commits attendance marks in groups.
+
+    ``submit`` hands a mark to a single background thread and returns a
+    future. The thread waits at most ``max_delay_ms`` after the first pending
+    mark (or until ``max_batch`` marks are waiting) and passes the whole group
+    to ``flush``, which must write it in one transaction. Concurrent kiosks
+    therefore share one commit instead of each paying for their own.
+
+    The future resolves to the number of marks in the group once ``flush``
+    returns, i.e. once the marks are committed. A failed group is retried
+    ``retries`` times before its futures get an :class:`AttendanceWriteError`.
+    ``close`` drains whatever is still queued.
+    """
+
+    def __init__(self, flush, max_batch=100, max_delay_ms=20, retries=2):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.retries = retries
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    @property
+    def pending(self):
+        with self._condition:
+            return len(self._pending)
+
+    def submit(self, user_id, timestamp):
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise AttendanceWriteError("Attendance writer is shut down")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+                self._thread.start()
+            self._pending.append(((user_id, timestamp), future))
+            self._condition.notify()
+        return future
+
+    def close(self, timeout=None):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Give concurrent marks a moment to join this group
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._write(batch)
+
+    def _write(self, batch):
+        marks = [mark for mark, _ in batch]
+        for attempt in range(self.retries + 1):
+            try:
+                self.flush(marks)
+                break
+            except Exception as e:
+                logger.warning("Attendance flush of %d marks failed (attempt %d): %s", len(marks), attempt + 1, e)
+                error = e
+                time.sleep(0.05 * (attempt + 1))
+        else:
+            for _, future in batch:
+                future.set_exception(AttendanceWriteError(f"Could not save attendance: {error}"))
+            return
+        for _, future in batch:
+            future.set_result(len(batch))
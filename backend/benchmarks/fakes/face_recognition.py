@@ -0,0 +1,33 @@
+"""Stand-in for the ``face_recognition`` package used by the benchmarks.
+
+Put this directory first on ``sys.path`` (``benchmarks.run`` does) to
+benchmark the service without dlib or real faces. Faces and encodings come
+from the identity stored in each synthetic frame. FAKE_DETECT_MS and
+FAKE_ENCODE_MS add a sleep per call to stand in for dlib's CPU time.
+"""
+import os
+import time
+
+from benchmarks.synthetic import face_box, frame_identity, synthetic_embedding
+
+DETECT_SECONDS = float(os.environ.get('FAKE_DETECT_MS', 0)) / 1000
+ENCODE_SECONDS = float(os.environ.get('FAKE_ENCODE_MS', 0)) / 1000
+
+
+def face_locations(img, number_of_times_to_upsample=1, model='hog'):
+    if DETECT_SECONDS:
+        time.sleep(DETECT_SECONDS)
+    if img.shape[0] < 8 or img.shape[1] < 8:
+        return []
+    token, _ = frame_identity(img)
+    if not token:
+        return []
+    return [face_box(img.shape[0], img.shape[1])]
+
+
+def face_encodings(face_image, known_face_locations=None, num_jitters=1, model='small'):
+    locations = face_locations(face_image) if known_face_locations is None else known_face_locations
+    if ENCODE_SECONDS:
+        time.sleep(ENCODE_SECONDS * len(locations))
+    token, capture = frame_identity(face_image)
+    return [synthetic_embedding(token, capture + i) for i, _ in enumerate(locations)]
@@ -0,0 +1,305 @@
+"""Benchmark and load-test the backend against a synthetic, temporary database.
+
+    cd backend
+    python -m benchmarks.run --users 2000 --records 100000
+    python -m benchmarks.run --scenarios load --concurrency 16 --requests 2000 --workers 4 --detect-ms 40 --encode-ms 15
+    python -m benchmarks.run --scenarios load --url http://127.0.0.1:8000    # a running gunicorn
+
+By default ``face_recognition`` is replaced with the fake in ``fakes/`` so
+the suite runs offline and gives repeatable numbers. ``--detect-ms`` and
+``--encode-ms`` make the fake take roughly as long as dlib on your hardware.
+``--real-face-recognition`` uses the installed package instead; synthetic
+frames then contain no faces, so only the detection cost is measured.
+
+Results are printed as latency percentiles and throughput. ``--json`` also
+writes them to a file so runs before and after a change can be compared.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'fakes')
+SCENARIOS = ('micro', 'endpoints', 'load')
+
+
+def summarize(name, latencies, wall_seconds=None, errors=0):
+    samples = np.asarray(latencies, dtype=np.float64) * 1000
+    result = {
+        'scenario': name,
+        'count': int(len(samples)),
+        'errors': errors,
+        'mean_ms': float(samples.mean()) if len(samples) else None,
+    }
+    for percentile in (50, 90, 95, 99):
+        result[f'p{percentile}_ms'] = float(np.percentile(samples, percentile)) if len(samples) else None
+    result['max_ms'] = float(samples.max()) if len(samples) else None
+    total = wall_seconds if wall_seconds is not None else samples.sum() / 1000
+    result['throughput_per_s'] = len(samples) / total if total else None
+    return result
+
+
+def measure(name, fn, repeat, warmup=3):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return summarize(name, latencies)
+
+
+def micro_benchmarks(A, args):
+    from benchmarks.synthetic import encode_frame, frame_data_url, synthetic_embedding, synthetic_frame
+    from embedding_index import EmbeddingIndex
+    from matcher import make_matcher
+    from quality import assess_faces
+    from recognition import encode_face, load_image
+
+    rs = random.Random(args.seed)
+    queries = [synthetic_embedding(rs.randint(1, args.users), capture=1) for _ in range(64)]
+    query_iter = itertools.cycle(queries)
+
+    with A.app.app_context():
+        exact = A.get_embedding_index()
+        rows = A.load_embeddings()
+    ivf = EmbeddingIndex(matcher=make_matcher('ivf', min_size=min(2000, len(rows))))
+    ivf.load(rows)
+
+    frame = synthetic_frame(1, capture=1)
+    data_url = frame_data_url(frame)
+    png = encode_frame(frame)
+    blob = A.pack_embedding(synthetic_embedding(1))
+    locations = [(60, 240, 180, 80)]
+
+    results = [
+        measure(f"match: best_match exact ({len(exact)} users)",
+                lambda: exact.best_match(next(query_iter), A.FACE_MATCH_THRESHOLD), args.repeat),
+        measure(f"match: best_match ivf ({len(ivf)} users)",
+                lambda: ivf.best_match(next(query_iter), A.FACE_MATCH_THRESHOLD), args.repeat),
+        measure("match: best_matches x32",
+                lambda: exact.best_matches(queries[:32], A.FACE_MATCH_THRESHOLD), args.repeat),
+        measure("match: index load", lambda: EmbeddingIndex().load(rows), max(5, args.repeat // 50)),
+        measure("decode: base64", lambda: A.to_image_bytes(data_url), args.repeat),
+        measure("decode: imdecode 320x240 png", lambda: load_image(png), args.repeat),
+        measure("decode: unpack embedding", lambda: A.unpack_embedding(blob), args.repeat),
+        measure("quality: assess largest face", lambda: assess_faces(frame, locations, A.ATTENDANCE_QUALITY), args.repeat),
+        measure("pipeline: encode_face inline", lambda: encode_face(png, A.ATTENDANCE_QUALITY), max(10, args.repeat // 10)),
+    ]
+    return results
+
+
+def endpoint_benchmarks(A, args, year, month):
+    client = A.app.test_client()
+    paths = [
+        f"/attendance/report/monthly?month={month}&year={year}",
+        f"/attendance/analytics/monthly?month={month}&year={year}",
+        f"/attendance/calendar/monthly?month={month}&year={year}&user_id=1",
+        "/users?limit=100",
+        "/attendance?limit=500",
+    ]
+    repeat = max(5, args.repeat // 20)
+    results = []
+    for path in paths:
+        def fetch(path=path):
+            response = client.get(path)
+            response.get_data()
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+        results.append(measure(f"GET {path.split('?')[0]}", fetch, repeat, warmup=1))
+    return results
+
+
+class HttpClient:
+    """Minimal JSON client for load-testing a server started separately."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, payload=None):
+        response = self.client.open(path, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+
+def drive(name, make_client, requests, concurrency, next_request):
+    """Send ``requests`` requests from ``concurrency`` threads; 2xx-4xx count as handled."""
+    latencies, statuses, lock = [], {}, threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        client = make_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            method, path, payload = next_request(i)
+            started = time.perf_counter()
+            try:
+                status = client.request(method, path, payload)
+            except Exception:
+                status = 'exception'
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if status == 'exception' or status >= 500)
+    result = summarize(name, latencies, wall, errors)
+    result['statuses'] = {str(status): count for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))}
+    return result
+
+
+def load_tests(A, args, year, month):
+    from benchmarks.synthetic import frame_data_url, synthetic_frame
+
+    rs = random.Random(args.seed)
+    # A pool of live frames: mostly enrolled people, some strangers
+    frames = []
+    for i in range(min(200, args.requests)):
+        token = rs.randint(1, args.users) if rs.random() < 0.9 else args.users + rs.randint(1, 10 ** 6)
+        frames.append(frame_data_url(synthetic_frame(token, capture=i + 1)))
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        make_client = lambda: InProcessClient(A.app)
+
+    scenarios = [
+        ("load: POST /mark_attendance", lambda i: ('POST', '/mark_attendance', {'facial_data': frames[i % len(frames)]})),
+        ("load: POST /detect_face", lambda i: ('POST', '/detect_face', {'facial_data': frames[i % len(frames)]})),
+        ("load: GET /attendance/analytics/monthly",
+         lambda i: ('GET', f"/attendance/analytics/monthly?month={month}&year={year}", None)),
+    ]
+    return [drive(name, make_client, args.requests, args.concurrency, next_request) for name, next_request in scenarios]
+
+
+def print_results(results):
+    columns = ('count', 'errors', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'throughput_per_s')
+    width = max(len(result['scenario']) for result in results) + 2
+    print(f"{'scenario':<{width}}" + ''.join(f"{column:>18}" for column in columns))
+    for result in results:
+        cells = []
+        for column in columns:
+            value = result.get(column)
+            cells.append(f"{value:>18.3f}" if isinstance(value, float) else f"{str(value):>18}")
+        print(f"{result['scenario']:<{width}}" + ''.join(cells))
+        if result.get('statuses'):
+            print(f"{'':<{width}}statuses: {result['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backend against a synthetic database.")
+    parser.add_argument('--users', type=int, default=1000, help="Enrolled users to generate")
+    parser.add_argument('--records', type=int, default=50000, help="Attendance rows to generate")
+    parser.add_argument('--days', type=int, default=60, help="Days of history the rows are spread over")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--archive', action='store_true', help="Move closed months into the columnar archive after seeding")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=500, help="Iterations per micro-benchmark")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients in load tests")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per load-test scenario")
+    parser.add_argument('--workers', type=int, default=0, help="RECOGNITION_WORKERS for the in-process app (0 = inline)")
+    parser.add_argument('--detect-ms', type=float, default=0, help="Simulated detection time of the fake face_recognition")
+    parser.add_argument('--encode-ms', type=float, default=0, help="Simulated encoding time of the fake face_recognition")
+    parser.add_argument('--real-face-recognition', action='store_true', help="Use the installed face_recognition package")
+    parser.add_argument('--url', help="Load-test this running server instead of the in-process app (seed it with the same --users)")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--keep-db', action='store_true', help="Keep the temporary database and print its path")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix='attendance-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['ATTENDANCE_ARCHIVE_DIR'] = os.path.join(workdir, 'archive')
+    os.environ['RECOGNITION_WORKERS'] = str(args.workers)
+    os.environ['FAKE_DETECT_MS'] = str(args.detect_ms)
+    os.environ['FAKE_ENCODE_MS'] = str(args.encode_ms)
+    os.environ.setdefault('CHATBOT_MODEL', 'stub')
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    if not args.real_face_recognition:
+        # Recognition worker processes inherit sys.path, so they pick up the fake too
+        sys.path.insert(0, FAKES_DIR)
+
+    import app as A
+    from benchmarks.seed import seed_database
+
+    started = time.perf_counter()
+    year, month = seed_database(A, args.users, args.records, args.days, args.seed)
+    print(f"Seeded {args.users} users and {args.records} attendance rows in {time.perf_counter() - started:.1f}s")
+    if args.archive:
+        started = time.perf_counter()
+        with A.app.app_context():
+            moved = A.archive_closed_months()
+        print(f"Archived {sum(count for _, count in moved)} rows from {len(moved)} months in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    A.warm_up()
+    print(f"Warmed up in {time.perf_counter() - started:.1f}s")
+
+    results = []
+    try:
+        if 'micro' in scenarios:
+            results += micro_benchmarks(A, args)
+        if 'endpoints' in scenarios:
+            results += endpoint_benchmarks(A, args, year, month)
+        if 'load' in scenarios:
+            results += load_tests(A, args, year, month)
+    finally:
+        A.recognition.shutdown()
+        A.attendance_writer.close()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2)
+    if args.keep_db:
+        print(f"Database kept at {os.path.join(workdir, 'bench.db')}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Synthetic data generator: N users with random 128-d embeddings and M attendance rows."""
+import random
+from datetime import date, datetime, time, timedelta
+
+from benchmarks.synthetic import synthetic_embedding
+
+
+def seed_database(app_module, users, records, days=60, seed=0, batch_size=5000):
+    """Fill the app's (empty) database and return the seeded month as ``(year, month)``.
+
+    User ``i`` gets id ``i`` and the embedding of synthetic token ``i``, so
+    ``synthetic_frame(i, capture)`` is recognized as that user. Attendance
+    rows fall on the ``days`` days before today, during working hours, and
+    the analytics rollups are rebuilt afterwards.
+    """
+    A = app_module
+    rs = random.Random(seed)
+    today = date.today()
+
+    with A.app.app_context():
+        A.upgrade_schema()
+
+        user_table = A.User.__table__
+        for start in range(1, users + 1, batch_size):
+            A.db.session.execute(user_table.insert(), [
+                {
+                    'id': i,
+                    'name': f"User {i}",
+                    'email': f"user{i}@example.com",
+                    'mobile_number': f"9{i:09d}",
+                    'gender': rs.choice(('Male', 'Female')),
+                    'embedding': A.pack_embedding(synthetic_embedding(i)),
+                }
+                for i in range(start, min(start + batch_size, users + 1))
+            ])
+
+        attendance_table = A.Attendance.__table__
+        for start in range(0, records, batch_size):
+            rows = []
+            for _ in range(min(batch_size, records - start)):
+                day = today - timedelta(days=rs.randint(1, days))
+                moment = datetime.combine(day, time(8)) + timedelta(seconds=rs.randint(0, 10 * 3600))
+                rows.append({'user_id': rs.randint(1, users), 'timestamp': moment})
+            A.db.session.execute(attendance_table.insert(), rows)
+        A.db.session.commit()
+
+        A.rebuild_attendance_rollups()
+        for name in ('users', 'embeddings', 'attendance'):
+            A.bump_data_version(name)
+        A.db.session.commit()
+
+    busiest = today - timedelta(days=min(days, 28))
+    return busiest.year, busiest.month
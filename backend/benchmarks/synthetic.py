@@ -0,0 +1,55 @@
+"""Synthetic identities, embeddings and camera frames.
+
+A frame stores the identity it shows (``token``) and which capture of that
+person it is in the first pixels of its top row. The fake
+``face_recognition`` module in ``fakes/`` reads them back, so recognition
+runs end to end without real faces and always gives the same answer.
+Token ``0`` means "no face in frame".
+"""
+import base64
+
+import cv2
+import numpy as np
+
+EMBEDDING_DIM = 128
+# Spreads chosen so distinct people land ~0.9 apart and repeat captures of
+# one person ~0.3 from their enrolment, roughly as with dlib encodings
+EMBEDDING_SCALE = 0.056
+CAPTURE_JITTER = 0.025
+FRAME_SIZE = (240, 320)
+
+
+def synthetic_embedding(token, capture=0):
+    embedding = np.random.RandomState(token).normal(0.0, EMBEDDING_SCALE, EMBEDDING_DIM)
+    if capture:
+        embedding = embedding + np.random.RandomState((token * 7919 + capture) % 2 ** 32).normal(0.0, CAPTURE_JITTER, EMBEDDING_DIM)
+    return embedding
+
+
+def face_box(height, width):
+    # (top, right, bottom, left): the middle half of the frame
+    return (height // 4, width * 3 // 4, height * 3 // 4, width // 4)
+
+
+def synthetic_frame(token, capture=0, size=FRAME_SIZE):
+    """A textured BGR frame that passes the default quality gate."""
+    height, width = size
+    rs = np.random.RandomState((token * 31 + capture) % 2 ** 32)
+    frame = np.clip(rs.normal(120, 35, (height, width, 3)), 0, 255).astype(np.uint8)
+    frame[0, :8, 0] = np.frombuffer(np.array([token, capture], dtype='>u4').tobytes(), dtype=np.uint8)
+    return frame
+
+
+def frame_identity(frame):
+    token, capture = np.frombuffer(frame[0, :8, 0].tobytes(), dtype='>u4')
+    return int(token), int(capture)
+
+
+def encode_frame(frame):
+    # PNG keeps the identity pixels intact
+    ok, buffer = cv2.imencode('.png', frame)
+    return buffer.tobytes()
+
+
+def frame_data_url(frame):
+    return 'data:image/png;base64,' + base64.b64encode(encode_frame(frame)).decode()
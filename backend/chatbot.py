@@ -0,0 +1,182 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+MONTH_NAMES = {
+    name: number
+    for number, names in enumerate([
+        ('january', 'jan'), ('february', 'feb'), ('march', 'mar'), ('april', 'apr'),
+        ('may',), ('june', 'jun'), ('july', 'jul'), ('august', 'aug'),
+        ('september', 'sep', 'sept'), ('october', 'oct'), ('november', 'nov'), ('december', 'dec'),
+    ], start=1)
+    for name in names
+}
+
+ISO_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+LAST_N_DAYS = re.compile(r'\b(?:last|past)\s+(\d{1,3})\s+days?\b')
+MONTH_MENTION = re.compile(r'\b(' + '|'.join(sorted(MONTH_NAMES, key=len, reverse=True)) + r')\b(?:\s+(\d{4}))?')
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def parse_date_range(question, today):
+    """Work out which dates a question is about.
+
+    Returns ``(start, end, label)`` with ``end`` exclusive, or
+    ``(None, None, 'all time')`` when the question names no period.
+    """
+    text = question.lower()
+
+    iso_dates = ISO_DATE.findall(text)
+    if iso_dates:
+        try:
+            days = sorted(date.fromisoformat(value) for value in iso_dates)
+        except ValueError:
+            days = None
+        if days:
+            label = days[0].isoformat() if len(days) == 1 else f"{days[0].isoformat()} to {days[-1].isoformat()}"
+            return days[0], days[-1] + timedelta(days=1), label
+
+    if 'today' in text:
+        return today, today + timedelta(days=1), 'today'
+    if 'yesterday' in text:
+        return today - timedelta(days=1), today, 'yesterday'
+
+    match = LAST_N_DAYS.search(text)
+    if match:
+        days = max(1, int(match.group(1)))
+        return today - timedelta(days=days - 1), today + timedelta(days=1), f"the last {days} days"
+
+    week_start = today - timedelta(days=today.weekday())
+    if 'this week' in text:
+        return week_start, week_start + timedelta(days=7), 'this week'
+    if 'last week' in text:
+        return week_start - timedelta(days=7), week_start, 'last week'
+
+    if 'this month' in text:
+        start, end = month_bounds(today.year, today.month)
+        return start, end, 'this month'
+    if 'last month' in text:
+        previous = today.replace(day=1) - timedelta(days=1)
+        start, end = month_bounds(previous.year, previous.month)
+        return start, end, 'last month'
+
+    match = MONTH_MENTION.search(text)
+    if match:
+        month = MONTH_NAMES[match.group(1)]
+        # Without a year, a month later than the current one means last year's
+        year = int(match.group(2)) if match.group(2) else today.year - (month > today.month)
+        start, end = month_bounds(year, month)
+        return start, end, start.strftime('%B %Y')
+
+    return None, None, 'all time'
+
+
+def find_mentioned_users(question, users):
+    """Return the ``(id, name)`` pairs whose name or email appears in the question."""
+    text = question.lower()
+    mentioned = []
+    for user_id, name, email in users:
+        if (name and re.search(r'\b' + re.escape(name.lower()) + r'\b', text)) or (email and email.lower() in text):
+            mentioned.append((user_id, name))
+    return mentioned
+
+
+def build_prompt(question, context):
+    return f"""You are an attendance chatbot. Based on the following attendance summary, answer the user's query. If you cannot find the information, state that you don't have it.
+
+Attendance Summary:
+{context}
+
+User Query: {question}
+
+Chatbot:"""
+
+
+class AnswerCache:
+    """Small LRU cache of chatbot answers with a time-to-live.
+
+    Keys should include the attendance/user data versions so that any write
+    naturally misses the cache instead of needing explicit invalidation.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Offline stand-in for the Gemini model: echoes the retrieved summary back."""
+
+    def generate_content(self, prompt):
+        summary = prompt.split('Attendance Summary:\n', 1)[-1].split('\n\nUser Query:', 1)[0]
+        return StubResponse(f"(offline answer) {summary}")
+
+
+class ChatbotClient:
+    """Holds one model client for the life of the process.
+
+    ``model_name='stub'`` uses :class:`StubModel`, so the chatbot can be
+    exercised without network access or an API key.
+    """
+
+    def __init__(self, model_name, api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._create_model()
+        return self._model
+
+    def _create_model(self):
+        if self.model_name == 'stub':
+            return StubModel()
+        import google.generativeai as genai
+        if self.api_key:
+            genai.configure(api_key=self.api_key)
+        return genai.GenerativeModel(self.model_name)
+
+    def generate(self, prompt):
+        return self.model.generate_content(prompt).text
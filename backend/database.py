@@ -1,7 +1,9 @@
-from app import app, db
+from app import app, upgrade_schema
 
 # This script can be run independently to initialize the database
-# if not using app.before_first_request or for migrations.
+# or to apply pending schema migrations.
 with app.app_context():
-    db.create_all()
+    applied = upgrade_schema()
     print("Database tables created.")
+    if applied:
+        print(f"Applied migrations: {', '.join(applied)}")
@@ -0,0 +1,230 @@
+import struct
+import threading
+
+import numpy as np
+
+from matcher import ExactMatcher
+
+# face_recognition produces 128-d encodings
+EMBEDDING_DIM = 128
+
+# Stored embeddings are raw little-endian floats behind a small header:
+# magic, format version, dtype code and dimension
+EMBEDDING_MAGIC = b'FE'
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_HEADER = struct.Struct('<2sBBH')
+EMBEDDING_DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f8')}
+EMBEDDING_DTYPE_CODES = {dtype: code for code, dtype in EMBEDDING_DTYPES.items()}
+
+
+def pack_embedding(encoding, dtype=np.float32):
+    """Serialize an encoding to the versioned binary format stored in ``user.embedding``."""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    encoding = np.ascontiguousarray(encoding, dtype=dtype).reshape(-1)
+    header = EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_FORMAT_VERSION,
+                                   EMBEDDING_DTYPE_CODES[dtype], encoding.shape[0])
+    return header + encoding.tobytes()
+
+
+def unpack_embedding(blob):
+    """Inverse of :func:`pack_embedding`; returns a read-only view over ``blob``."""
+    magic, version, dtype_code, dim = EMBEDDING_HEADER.unpack_from(blob)
+    if magic != EMBEDDING_MAGIC or version != EMBEDDING_FORMAT_VERSION:
+        raise ValueError("Unsupported embedding format")
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPES[dtype_code], count=dim, offset=EMBEDDING_HEADER.size)
+
+
+class EmbeddingIndex:
+    """In-memory matrix of enrolled face encodings with a parallel array of user ids.
+
+    The index is process-wide: it is loaded once from the database and then kept
+    in sync by the routes that write embeddings. ``revision`` mirrors the
+    ``embeddings`` data version so that a process which missed a write made by
+    another worker reloads instead of matching against stale rows.
+
+    Which rows get scored for a query is delegated to ``matcher`` (see
+    ``matcher.py``); distances are always computed exactly over those rows.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, dtype=np.float32, matcher=None):
+        self.dim = dim
+        self.dtype = dtype
+        self.matcher = matcher or ExactMatcher()
+        self.revision = None
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self, capacity=0):
+        self._matrix = np.empty((capacity, self.dim), dtype=self.dtype)
+        self._user_ids = np.empty(capacity, dtype=np.int64)
+        self._rows = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, user_id):
+        return user_id in self._rows
+
+    def ensure_loaded(self, loader, revision=None):
+        """Load the index with ``loader()`` unless it is already current.
+
+        ``loader`` returns an iterable of ``(user_id, encoding)`` pairs and is
+        only called when the index is empty or ``revision`` has moved on.
+        """
+        if self.loaded and (revision is None or revision == self.revision):
+            return self
+        with self._lock:
+            if not self.loaded or (revision is not None and revision != self.revision):
+                self.load(loader(), revision)
+        return self
+
+    def load(self, rows, revision=None):
+        rows = list(rows)
+        with self._lock:
+            self._reset(capacity=len(rows))
+            for user_id, encoding in rows:
+                self._put(user_id, encoding)
+            self.matcher.rebuild(self._matrix[:self._size])
+            self.revision = revision
+            self.loaded = True
+
+    def upsert(self, user_id, encoding, revision=None):
+        with self._lock:
+            row = self._put(user_id, encoding)
+            if self.matcher.needs_rebuild(self._size):
+                self.matcher.rebuild(self._matrix[:self._size])
+            else:
+                self.matcher.assign(row, self._matrix[row])
+            self._advance(revision)
+
+    def upsert_many(self, rows, revision=None):
+        """Add or replace several ``(user_id, encoding)`` pairs as one write."""
+        with self._lock:
+            for user_id, encoding in rows:
+                self._put(user_id, encoding)
+            self.matcher.rebuild(self._matrix[:self._size])
+            self._advance(revision)
+
+    def remove(self, user_id, revision=None):
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is not None:
+                # Move the last row into the hole so the matrix stays contiguous
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._user_ids[row] = self._user_ids[last]
+                    self._rows[int(self._user_ids[row])] = row
+                    self.matcher.move(last, row)
+                self._size = last
+                self.matcher.truncate(last)
+            self._advance(revision)
+
+    def distances(self, encoding):
+        """Return ``(user_ids, distances)`` for every enrolled encoding."""
+        user_ids, distances, _ = self._score(encoding, exact=True)
+        return user_ids, distances
+
+    def search(self, encoding, k=1, exact=False):
+        """Return the ``k`` closest ``(user_ids, distances)``, nearest first."""
+        user_ids, distances, _ = self._score(encoding, exact)
+        return self._top_k(user_ids, distances, k)
+
+    def best_match(self, encoding, threshold, exact=False):
+        """Return ``(user_id, distance)`` of the closest encoding under ``threshold``.
+
+        ``user_id`` is ``None`` when nothing is close enough; ``distance`` is
+        ``None`` when the index is empty. ``exact`` forces a full scan whatever
+        the matcher backend.
+        """
+        user_ids, distances, approximate = self._score(encoding, exact)
+        user_ids, distances = self._top_k(user_ids, distances, 1)
+        # Re-check with a full scan when the probed rows found nothing, or only a borderline match
+        limit = threshold - self.matcher.exact_margin
+        if approximate and self.matcher.exact_fallback and not (len(distances) and distances[0] < limit):
+            user_ids, distances = self.search(encoding, 1, exact=True)
+        if not len(distances):
+            return None, None
+        distance = float(distances[0])
+        if distance < threshold:
+            return int(user_ids[0]), distance
+        return None, distance
+
+    def best_matches(self, encodings, threshold):
+        """Vectorized :meth:`best_match` for a batch of encodings (always exact).
+
+        Scores every query against every enrolled row with one matrix product and
+        returns a list of ``(user_id, distance)`` pairs in query order.
+        """
+        queries = np.asarray(encodings, dtype=self.dtype).reshape(-1, self.dim)
+        with self._lock:
+            user_ids = self._user_ids[:self._size].copy()
+            vectors = self._matrix[:self._size]
+            if not self._size or not len(queries):
+                return [(None, None)] * len(queries)
+            # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x
+            squared = (queries ** 2).sum(axis=1)[:, np.newaxis] + (vectors ** 2).sum(axis=1) - 2.0 * queries @ vectors.T
+            best = np.argmin(squared, axis=1)
+            # Recompute the winners directly; the expansion above loses precision near zero
+            distances = np.linalg.norm(vectors[best] - queries, axis=1)
+        return [
+            (int(user_ids[column]) if distance < threshold else None, float(distance))
+            for column, distance in zip(best, distances)
+        ]
+
+    def _score(self, encoding, exact):
+        encoding = np.asarray(encoding, dtype=self.dtype).reshape(-1)
+        with self._lock:
+            rows = None if exact else self.matcher.candidates(encoding, self._size)
+            if rows is None:
+                user_ids = self._user_ids[:self._size].copy()
+                vectors = self._matrix[:self._size]
+            else:
+                user_ids = self._user_ids[rows]
+                vectors = self._matrix[rows]
+            distances = np.linalg.norm(vectors - encoding, axis=1)
+        return user_ids, distances, rows is not None
+
+    @staticmethod
+    def _top_k(user_ids, distances, k):
+        if len(distances) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+        else:
+            nearest = np.arange(len(distances))
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return user_ids[nearest], distances[nearest]
+
+    def _put(self, user_id, encoding):
+        encoding = np.asarray(encoding, dtype=self.dtype).reshape(-1)
+        if encoding.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-d encoding, got {encoding.shape[0]}")
+        row = self._rows.get(user_id)
+        if row is None:
+            if self._size == self._matrix.shape[0]:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[user_id] = row
+            self._user_ids[row] = user_id
+        self._matrix[row] = encoding
+        return row
+
+    def _grow(self):
+        capacity = max(16, self._matrix.shape[0] * 2)
+        matrix = np.empty((capacity, self.dim), dtype=self.dtype)
+        user_ids = np.empty(capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        user_ids[:self._size] = self._user_ids[:self._size]
+        self._matrix = matrix
+        self._user_ids = user_ids
+
+    def _advance(self, revision):
+        if revision is None:
+            return
+        if self.revision is not None and revision == self.revision + 1:
+            self.revision = revision
+        else:
+            # Another process wrote in between; reload on next use
+            self.loaded = False
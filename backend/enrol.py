@@ -0,0 +1,54 @@
+"""Bulk-enrol users from a CSV of details and a folder or archive of photos.
+
+    python enrol.py students.csv photos/ [--dry-run] [--report report.csv]
+
+The CSV needs name, email, mobile_number, gender and image columns, where
+image is the photo's file name or path inside the folder/archive. Photos are
+encoded on the recognition pool (RECOGNITION_WORKERS), duplicates are
+dropped, and everything else is inserted in one transaction.
+"""
+import argparse
+import csv
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-enrol users from a CSV and a folder or archive of photos.")
+    parser.add_argument('csv_path', help="CSV with name, email, mobile_number, gender and image columns")
+    parser.add_argument('images', help="Folder, zip or tar archive containing the photos")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would happen without inserting anything")
+    parser.add_argument('--report', help="Write the per-row report to this CSV file")
+    args = parser.parse_args()
+
+    # Imported here so recognition worker processes don't load the app when they start
+    from app import app, enrol_users, recognition
+    from enrolment import open_image_source, read_enrolment_csv
+
+    try:
+        with open(args.csv_path, newline='', encoding='utf-8-sig') as f:
+            rows = read_enrolment_csv(f.read())
+        images = open_image_source(args.images)
+    except (OSError, ValueError) as e:
+        sys.exit(f"error: {e}")
+
+    with app.app_context():
+        report = enrol_users(rows, images, args.dry_run)
+    recognition.shutdown()
+
+    if args.report:
+        fields = ['row', 'email', 'image', 'status', 'user_id', 'duplicate_of', 'distance', 'error']
+        with open(args.report, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(report['rows'])
+    else:
+        for entry in report['rows']:
+            if entry['status'] not in ('created', 'would_create'):
+                print(f"row {entry['row']} ({entry['email'] or entry['image']}): {entry['status']}"
+                      + (f" - {entry['error']}" if entry.get('error') else ''))
+
+    print(', '.join(f"{status}: {count}" for status, count in sorted(report['summary'].items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import csv
+import io
+import os
+import posixpath
+import tarfile
+import zipfile
+
+import numpy as np
+
+ENROLMENT_FIELDS = ('name', 'email', 'mobile_number', 'gender', 'image')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def read_enrolment_csv(text):
+    """Parse the enrolment CSV into a list of dicts with stripped values.
+
+    The header must name every column in ``ENROLMENT_FIELDS``; ``image`` is
+    the file name (or relative path) of the row's photo. Raises ``ValueError``
+    when a column is missing.
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    header = [field.strip().lower() for field in reader.fieldnames or []]
+    missing = [field for field in ENROLMENT_FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+    reader.fieldnames = header
+    return [
+        {field: (row.get(field) or '').strip() for field in ENROLMENT_FIELDS}
+        for row in reader
+    ]
+
+
+def open_image_source(source):
+    """Map image paths to zero-argument callables returning the file's bytes.
+
+    ``source`` is a directory path, or a zip/tar archive given as a path or a
+    seekable file object. Images are only read when their callable is called,
+    so a large intake never has to fit in memory at once.
+    """
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        return _directory_images(source)
+    if zipfile.is_zipfile(source):
+        return _zip_images(zipfile.ZipFile(source))
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    try:
+        archive = tarfile.open(source) if isinstance(source, (str, os.PathLike)) else tarfile.open(fileobj=source)
+    except tarfile.TarError:
+        raise ValueError("Images must be a directory, a zip archive or a tar archive")
+    return _tar_images(archive)
+
+
+def _is_image(name):
+    base = posixpath.basename(name)
+    return not base.startswith('.') and base.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _directory_images(root):
+    images = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            if _is_image(relative):
+                images[relative] = lambda path=path: _read_file(path)
+    return images
+
+
+def _zip_images(archive):
+    return {
+        info.filename: lambda info=info: archive.read(info)
+        for info in archive.infolist()
+        if not info.is_dir() and _is_image(info.filename)
+    }
+
+
+def _tar_images(archive):
+    return {
+        member.name.lstrip('./'): lambda member=member: archive.extractfile(member).read()
+        for member in archive.getmembers()
+        if member.isfile() and _is_image(member.name)
+    }
+
+
+def resolve_image(images, name, by_basename=None):
+    """Find ``name`` in ``images`` by relative path, falling back to a unique file name."""
+    name = name.replace('\\', '/').lstrip('./')
+    if name in images:
+        return images[name]
+    if by_basename is None:
+        by_basename = basename_index(images)
+    matches = by_basename.get(posixpath.basename(name), [])
+    return images[matches[0]] if len(matches) == 1 else None
+
+
+def basename_index(images):
+    by_basename = {}
+    for path in images:
+        by_basename.setdefault(posixpath.basename(path), []).append(path)
+    return by_basename
+
+
+def batch_duplicates(encodings, threshold, block_size=1024):
+    """For each encoding, the position of the first earlier one within ``threshold``, else ``None``.
+
+    Distances are computed a block of rows at a time against every earlier
+    row, so memory stays at ``block_size * len(encodings)`` floats.
+    """
+    vectors = np.asarray(encodings, dtype=np.float32).reshape(len(encodings), -1)
+    squared_norms = (vectors ** 2).sum(axis=1)
+    threshold_squared = threshold ** 2
+    duplicates = [None] * len(vectors)
+    for start in range(0, len(vectors), block_size):
+        stop = min(start + block_size, len(vectors))
+        block = vectors[start:stop]
+        squared = squared_norms[start:stop, np.newaxis] + squared_norms[:stop] - 2.0 * block @ vectors[:stop].T
+        # Only earlier rows count: mask the diagonal and everything after it
+        squared[np.triu_indices(stop - start, k=start, m=stop)] = np.inf
+        close = squared < threshold_squared
+        for offset in np.flatnonzero(close.any(axis=1)):
+            duplicates[start + offset] = int(np.argmax(close[offset]))
+    return duplicates
@@ -0,0 +1,20 @@
+# gunicorn settings for the backend:  cd backend && gunicorn app:app
+# Everything else (bind, workers, --preload, ...) can be given on the command line or in
+# GUNICORN_CMD_ARGS, e.g. GUNICORN_CMD_ARGS="--bind 0.0.0.0:8000 --workers 4 --preload".
+
+
+def post_fork(server, worker):
+    # With --preload the app was imported in the master; don't let workers share its connections
+    if server.cfg.preload_app:
+        from app import app, db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Load the embedding index and the recognition models before taking requests
+    from app import warm_up
+    try:
+        warm_up()
+    except Exception:
+        worker.log.exception("Warm-up failed; the first requests will load what they need")
@@ -0,0 +1,148 @@
+import numpy as np
+
+
+class ExactMatcher:
+    """Brute-force matcher: every enrolled row is a candidate.
+
+    Matchers only choose which rows of the :class:`EmbeddingIndex` matrix are
+    worth scoring; the index always computes exact distances over the rows a
+    matcher returns, so the threshold semantics stay the same for every backend.
+    The index calls ``assign``/``move``/``truncate`` as rows change so a
+    matcher can keep its own bookkeeping aligned with the matrix.
+    """
+
+    name = 'exact'
+    exact_fallback = False
+    exact_margin = 0.0
+
+    def rebuild(self, matrix):
+        pass
+
+    def assign(self, row, vector):
+        pass
+
+    def move(self, src, dst):
+        pass
+
+    def truncate(self, size):
+        pass
+
+    def needs_rebuild(self, size):
+        return False
+
+    def candidates(self, query, size):
+        # None means "scan everything"
+        return None
+
+
+class IVFMatcher(ExactMatcher):
+    """Inverted-file matcher over k-means partitions of the enrolled encodings.
+
+    ``n_probe`` is the recall-vs-latency knob: each query scores only the rows
+    in the ``n_probe`` partitions whose centroids are closest. When none of
+    those rows is under the threshold and ``exact_fallback`` is set, the index
+    re-checks with a full scan, so a face is never reported unrecognized by
+    the approximate path alone. The same happens when the best probed row is
+    within ``exact_margin`` of the threshold. A match well under it can still
+    differ from the exact one if the true nearest face sits in an unprobed
+    partition, so this is a recall trade-off rather than a guarantee.
+    """
+
+    name = 'ivf'
+
+    def __init__(self, n_lists=None, n_probe=8, min_size=2000, iterations=10,
+                 exact_fallback=True, exact_margin=0.1, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_size = min_size
+        self.iterations = iterations
+        self.exact_fallback = exact_fallback
+        self.exact_margin = exact_margin
+        self.seed = seed
+        self.centroids = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+        self._lists = None
+
+    def rebuild(self, matrix):
+        size = matrix.shape[0]
+        self.centroids = None
+        self._trained_size = size
+        self._lists = None
+        self._assignments = np.full(max(size, 16), -1, dtype=np.int32)
+        if size < self.min_size:
+            return
+        n_lists = self.n_lists or int(np.sqrt(size))
+        self.centroids = self._kmeans(matrix, n_lists)
+        self._assignments[:size] = self._nearest_centroids(matrix)[:, 0]
+
+    def assign(self, row, vector):
+        if row >= self._assignments.shape[0]:
+            grown = np.full(max(16, self._assignments.shape[0] * 2), -1, dtype=np.int32)
+            grown[:self._assignments.shape[0]] = self._assignments
+            self._assignments = grown
+        if self.centroids is not None:
+            self._assignments[row] = self._nearest_centroids(vector[np.newaxis, :])[0, 0]
+        self._lists = None
+
+    def move(self, src, dst):
+        self._assignments[dst] = self._assignments[src]
+        self._lists = None
+
+    def truncate(self, size):
+        self._assignments[size:] = -1
+        self._lists = None
+
+    def needs_rebuild(self, size):
+        # Retrain once the enrolment has doubled (or first crosses min_size)
+        if self.centroids is None:
+            return size >= self.min_size
+        return size >= 2 * self._trained_size
+
+    def candidates(self, query, size):
+        if self.centroids is None:
+            return None
+        if self._lists is None:
+            # Regroup row numbers by partition; only needed after writes
+            order = np.argsort(self._assignments[:size], kind='stable')
+            bounds = np.searchsorted(self._assignments[:size][order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds)
+        order, bounds = self._lists
+        probes = self._nearest_centroids(query[np.newaxis, :], self.n_probe)[0]
+        return np.concatenate([order[bounds[p]:bounds[p + 1]] for p in probes])
+
+    def _nearest_centroids(self, vectors, count=1):
+        # Squared L2 via ||x||^2 - 2x.c + ||c||^2; ||x||^2 does not change the ranking
+        scores = (self.centroids ** 2).sum(axis=1) - 2.0 * vectors @ self.centroids.T
+        count = min(count, scores.shape[1])
+        if count == 1:
+            return np.argmin(scores, axis=1)[:, np.newaxis]
+        nearest = np.argpartition(scores, count - 1, axis=1)[:, :count]
+        return np.take_along_axis(nearest, np.argsort(np.take_along_axis(scores, nearest, axis=1), axis=1), axis=1)
+
+    def _kmeans(self, matrix, n_lists):
+        rng = np.random.default_rng(self.seed)
+        n_lists = max(1, min(n_lists, matrix.shape[0]))
+        self.centroids = matrix[rng.choice(matrix.shape[0], n_lists, replace=False)].astype(np.float32)
+        for _ in range(self.iterations):
+            labels = self._nearest_centroids(matrix)[:, 0]
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, matrix)
+            counts = np.bincount(labels, minlength=n_lists)
+            filled = counts > 0
+            self.centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+        return self.centroids
+
+
+MATCHERS = {
+    ExactMatcher.name: ExactMatcher,
+    IVFMatcher.name: IVFMatcher,
+}
+
+
+def make_matcher(name='exact', **options):
+    try:
+        matcher_class = MATCHERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown matcher backend '{name}'. Choose from: {', '.join(MATCHERS)}")
+    return matcher_class(**options)
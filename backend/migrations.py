@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+schema_migrations = sa.Table(
+    'schema_migrations', sa.MetaData(),
+    sa.Column('id', sa.String(100), primary_key=True),
+    sa.Column('applied_at', sa.DateTime, nullable=False),
+)
+
+
+def applied_migrations(engine):
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.id for row in conn.execute(sa.select(schema_migrations.c.id))}
+
+
+def run_migrations(engine, migrations):
+    """Apply ``(id, step)`` pairs that haven't been recorded yet, in list order.
+
+    Each step runs on its own and is recorded in ``schema_migrations`` once it
+    returns, so a failed step is retried on the next run. Steps should be
+    idempotent: databases created before this table existed may already have
+    some of their changes. Returns the ids applied by this call.
+    """
+    done = applied_migrations(engine)
+    applied = []
+    for migration_id, step in migrations:
+        if migration_id in done:
+            continue
+        step()
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(id=migration_id, applied_at=datetime.utcnow()))
+        applied.append(migration_id)
+    return applied
+
+
+def add_missing_columns(engine, table_name, columns):
+    """``ALTER TABLE ... ADD COLUMN`` for each of ``columns`` the table doesn't have yet."""
+    existing = {column['name'] for column in sa.inspect(engine).get_columns(table_name)}
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for column in columns:
+            if column.name in existing:
+                continue
+            conn.execute(sa.text(
+                f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN "
+                f"{preparer.quote(column.name)} {column.type.compile(engine.dialect)}"
+            ))
+
+
+def create_missing_indexes(engine, metadata):
+    # create_all() only creates indexes together with new tables
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
@@ -0,0 +1,114 @@
+class QualityPolicy:
+    """Thresholds a face must meet before it is worth encoding.
+
+    ``min_face_size`` is in pixels (the shorter side of the detected box),
+    ``min_sharpness`` is the variance of the Laplacian over the face and the
+    brightness bounds apply to its mean grey level (0-255). A zero/``None``
+    threshold disables that check; ``enabled=False`` disables all of them.
+    ``max_faces`` rejects frames with more faces than that.
+    """
+
+    FIELDS = ('min_face_size', 'min_sharpness', 'min_brightness', 'max_brightness', 'max_faces')
+
+    def __init__(self, min_face_size=0, min_sharpness=0.0, min_brightness=0, max_brightness=255,
+                 max_faces=None, enabled=True):
+        self.min_face_size = min_face_size
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_faces = max_faces
+        self.enabled = enabled
+
+    def replace(self, **changes):
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        values['enabled'] = self.enabled
+        values.update(changes)
+        return QualityPolicy(**values)
+
+    @classmethod
+    def from_spec(cls, spec, default):
+        """Override ``default`` from a spec such as ``"min_face_size=48,min_sharpness=15"``.
+
+        ``"off"`` disables the gate; an empty spec keeps ``default``.
+        """
+        if not spec:
+            return default
+        if spec.strip().lower() == 'off':
+            return default.replace(enabled=False)
+        changes = {}
+        for item in spec.split(','):
+            key, _, value = item.partition('=')
+            key = key.strip()
+            if key not in cls.FIELDS:
+                raise ValueError(f"Unknown quality setting: {key}")
+            changes[key] = float(value) if key == 'min_sharpness' else int(value)
+        return default.replace(**changes)
+
+
+def reason(code, message, value=None, limit=None):
+    return {"code": code, "message": message, "value": value, "limit": limit}
+
+
+def face_metrics(gray, location):
+    import cv2
+    top, right, bottom, left = location
+    crop = gray[max(top, 0):max(bottom, 0), max(left, 0):max(right, 0)]
+    metrics = {"face_size": int(min(bottom - top, right - left))}
+    if crop.size:
+        metrics["sharpness"] = round(float(cv2.Laplacian(crop, cv2.CV_64F).var()), 1)
+        metrics["brightness"] = round(float(crop.mean()), 1)
+    else:
+        metrics["sharpness"] = metrics["brightness"] = 0.0
+    return metrics
+
+
+def assess_faces(image, locations, policy):
+    """Pick the largest face and check it against ``policy``.
+
+    Returns ``(index, reasons, metrics)``: ``index`` is the position of the
+    face to encode in ``locations``, or ``None`` when the frame is rejected,
+    in which case ``reasons`` explains why.
+    """
+    if not locations:
+        return None, [reason('no_face', "No face found in the provided image.")], {"faces": 0}
+    if policy.enabled and policy.max_faces and len(locations) > policy.max_faces:
+        return None, [reason('too_many_faces', "Too many faces found in the provided image.",
+                             len(locations), policy.max_faces)], {"faces": len(locations)}
+
+    index = max(range(len(locations)), key=lambda i: (locations[i][2] - locations[i][0]) * (locations[i][1] - locations[i][3]))
+    if not policy.enabled:
+        return index, [], {"faces": len(locations)}
+
+    reasons, metrics = check_face(to_gray(image), locations[index], policy)
+    metrics["faces"] = len(locations)
+    return (None if reasons else index), reasons, metrics
+
+
+def to_gray(image):
+    import cv2
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def check_face(gray, location, policy):
+    """Check one detected face against ``policy``; returns ``(reasons, metrics)``.
+
+    ``max_faces`` is a property of the frame, so it is not checked here.
+    """
+    metrics = face_metrics(gray, location)
+    if not policy.enabled:
+        return [], metrics
+
+    reasons = []
+    if policy.min_face_size and metrics["face_size"] < policy.min_face_size:
+        reasons.append(reason('face_too_small', "Face is too small; move closer to the camera.",
+                              metrics["face_size"], policy.min_face_size))
+    if policy.min_sharpness and metrics["sharpness"] < policy.min_sharpness:
+        reasons.append(reason('too_blurry', "Image is too blurry; hold still.",
+                              metrics["sharpness"], policy.min_sharpness))
+    if policy.min_brightness and metrics["brightness"] < policy.min_brightness:
+        reasons.append(reason('too_dark', "Face is too dark; improve the lighting.",
+                              metrics["brightness"], policy.min_brightness))
+    if policy.max_brightness is not None and policy.max_brightness < 255 and metrics["brightness"] > policy.max_brightness:
+        reasons.append(reason('too_bright', "Face is overexposed; reduce the lighting.",
+                              metrics["brightness"], policy.max_brightness))
+    return reasons, metrics
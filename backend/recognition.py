@@ -0,0 +1,329 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from quality import QualityPolicy, assess_faces, check_face, to_gray
+from tracking import box_iou
+
+# OpenCV and face_recognition are imported where they are used: importing face_recognition
+# loads dlib's models, which takes seconds and hundreds of megabytes that processes which
+# never recognize a face (database.py, the web workers of a pooled deployment) shouldn't pay.
+# These are the modules a forkserver imports once before forking the pool workers.
+MODEL_MODULES = ('cv2', 'face_recognition', 'recognition')
+
+
+class RecognitionUnavailable(Exception):
+    status_code = 503
+
+
+class RecognitionBusy(RecognitionUnavailable):
+    status_code = 503
+
+
+class RecognitionTimeout(RecognitionUnavailable):
+    status_code = 504
+
+
+def load_image(image_bytes):
+    import cv2
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def detect_faces(image_bytes, max_width=None, model='hog', upsample=1):
+    """Return ``(locations, timings)`` for the faces in ``image_bytes``.
+
+    Images wider than ``max_width`` are downscaled before detection and the
+    boxes are scaled back to the original resolution. ``locations`` is
+    ``None`` if the image could not be decoded.
+    """
+    started = time.perf_counter()
+    image = load_image(image_bytes)
+    decoded = time.perf_counter()
+    timings = {"decode_ms": (decoded - started) * 1000}
+    if image is None:
+        return None, timings
+
+    locations, scale, resized = _locate(image, max_width, model, upsample)
+    timings["resize_ms"] = (resized - decoded) * 1000
+    timings["detect_ms"] = (time.perf_counter() - resized) * 1000
+    timings["scale"] = scale
+    return locations, timings
+
+
+def _locate(image, max_width, model='hog', upsample=1):
+    import cv2
+    import face_recognition
+    # Detect on a downscaled copy and map the boxes back to full resolution
+    scale = 1.0
+    if max_width and image.shape[1] > max_width:
+        scale = max_width / image.shape[1]
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    resized = time.perf_counter()
+
+    locations = face_recognition.face_locations(image, number_of_times_to_upsample=upsample, model=model)
+    if scale != 1.0:
+        locations = [tuple(int(round(value / scale)) for value in location) for location in locations]
+    return locations, scale, resized
+
+
+def encode_faces(image_bytes, max_faces=None):
+    """Return ``(locations, encodings)`` for the first ``max_faces`` faces found.
+
+    ``None`` is returned if the image could not be decoded.
+    """
+    import face_recognition
+    image = load_image(image_bytes)
+    if image is None:
+        return None
+    locations = face_recognition.face_locations(image)
+    if not locations:
+        return [], []
+    encodings = face_recognition.face_encodings(image, locations[:max_faces])
+    return locations, encodings
+
+
+def encode_face(image_bytes, policy=None):
+    """Encode the largest face in ``image_bytes`` if it passes ``policy``.
+
+    The quality checks only need the detected boxes, so frames that fail them
+    never reach the expensive encoding step. Returns ``None`` if the image
+    could not be decoded, otherwise ``(encoding, reasons, metrics, timings)``
+    where ``encoding`` is ``None`` and ``reasons`` non-empty for a rejected
+    frame, and ``timings`` gives the seconds spent in each stage.
+    """
+    import face_recognition
+    started = time.perf_counter()
+    image = load_image(image_bytes)
+    decoded = time.perf_counter()
+    if image is None:
+        return None
+    locations = face_recognition.face_locations(image)
+    detected = time.perf_counter()
+    index, reasons, metrics = assess_faces(image, locations, policy or QualityPolicy(enabled=False))
+    assessed = time.perf_counter()
+    timings = {"decode": decoded - started, "detect": detected - decoded, "quality": assessed - detected}
+    if index is None:
+        return None, reasons, metrics, timings
+    encoding = face_recognition.face_encodings(image, [locations[index]])[0]
+    timings["encode"] = time.perf_counter() - assessed
+    return encoding, [], metrics, timings
+
+
+def track_faces(image_bytes, skip_boxes=(), max_width=None, iou_threshold=0.3, policy=None):
+    """Detect faces and encode only those not covered by ``skip_boxes``.
+
+    ``skip_boxes`` are the boxes of tracks whose identity is being reused, so
+    those faces are not encoded again. Every other face must pass ``policy``
+    on its own to be encoded. Returns ``(locations, encodings, reasons)``
+    with ``None`` in place of encodings that were skipped and, per face, the
+    quality rejections (empty unless it failed), or ``None`` if the image
+    could not be decoded.
+    """
+    import face_recognition
+    image = load_image(image_bytes)
+    if image is None:
+        return None
+    locations, _, _ = _locate(image, max_width)
+    candidates = [
+        i for i, location in enumerate(locations)
+        if not any(box_iou(location, box) >= iou_threshold for box in skip_boxes)
+    ]
+    reasons = [[] for _ in locations]
+    if candidates and policy is not None and policy.enabled:
+        gray = to_gray(image)
+        for i in candidates:
+            reasons[i] = check_face(gray, locations[i], policy)[0]
+    to_encode = [i for i in candidates if not reasons[i]]
+    encodings = [None] * len(locations)
+    if to_encode:
+        for i, encoding in zip(to_encode, face_recognition.face_encodings(image, [locations[i] for i in to_encode])):
+            encodings[i] = encoding
+    return locations, encodings, reasons
+
+
+def load_models():
+    # Force dlib to load its models now rather than on the first real job
+    import face_recognition
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    face_recognition.face_locations(blank)
+    face_recognition.face_encodings(blank, [(0, 63, 63, 0)])
+
+
+class RecognitionService:
+    """Runs CPU-bound detection/encoding jobs on a process pool.
+
+    At most ``max_pending`` jobs may be queued or running at once; beyond that
+    :meth:`submit` raises :class:`RecognitionBusy` so the HTTP layer can shed
+    load instead of piling requests up. With ``workers=0`` jobs run inline on
+    the calling thread, which is handy for development and tests; there the
+    request threads already bound the concurrency, so unless ``max_pending``
+    is given nothing is turned away.
+
+    A pool whose worker died (killed for memory, crashed in dlib) is replaced,
+    and the jobs it lost fail with :class:`RecognitionUnavailable`. A job that
+    times out keeps running and holds its worker and slot, so after
+    ``recycle_after`` timeouts in a row the pool is killed and replaced too.
+
+    Pool workers are started with ``start_method``. With ``'spawn'`` each one
+    imports and loads the models itself; with ``'forkserver'`` they are loaded
+    once in the fork server and the workers forked from it share that memory
+    copy-on-write.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=10.0, start_method='spawn', recycle_after=3):
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        if max_pending is None and self.workers > 0:
+            max_pending = self.workers * 2
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.start_method = start_method
+        self.recycle_after = recycle_after
+        self._timeouts = 0
+        self._slots = threading.BoundedSemaphore(max_pending) if max_pending else None
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def start(self):
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                context = multiprocessing.get_context(self.start_method)
+                if self.start_method == 'forkserver':
+                    context.set_forkserver_preload(list(MODEL_MODULES))
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=load_models,
+                )
+        return self
+
+    def warm_up(self, timeout=60.0):
+        """Load the models now so the first request doesn't wait for them.
+
+        Inline, they are loaded in this process. Otherwise the pool is started
+        with a job per worker and this returns once the workers are ready.
+        """
+        if self.workers <= 0:
+            load_models()
+            return
+        futures = [self.start()._executor.submit(load_models) for _ in range(self.workers)]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, fn, *args):
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            raise RecognitionBusy("Face recognition is busy, please retry shortly")
+        with self._lock:
+            self._pending += 1
+
+        if self.workers > 0:
+            executor = self.start()._executor
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._release()
+                self._retire(executor)
+                raise RecognitionUnavailable("Face recognition is restarting, please retry shortly")
+            except Exception:
+                self._release()
+                raise
+        else:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        # The slot is only freed once the job has really finished, even after a timeout
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def result(self, future):
+        executor = self._executor
+        try:
+            result = future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            if getattr(executor, '_broken', False):
+                self._retire(executor)
+            raise RecognitionUnavailable("Face recognition is restarting, please retry shortly")
+        except FutureTimeoutError:
+            # cancel() only stops a job that hasn't started; a running one keeps its worker
+            if not future.cancel() and executor is not None:
+                with self._lock:
+                    self._timeouts += 1
+                    stuck = self.recycle_after and self._timeouts >= self.recycle_after
+                if stuck:
+                    self._retire(executor, kill=True)
+            raise RecognitionTimeout("Face recognition timed out")
+        self._timeouts = 0
+        return result
+
+    def run(self, fn, *args):
+        return self.result(self.submit(fn, *args))
+
+    def map(self, fn, arguments, max_in_flight=None):
+        """Run ``fn(*args)`` for each tuple in ``arguments``, yielding outcomes in order.
+
+        Meant for bulk work: at most ``max_in_flight`` jobs (default one per
+        worker) are submitted at a time, and a full queue means waiting for
+        a slot rather than :class:`RecognitionBusy`. ``arguments`` is consumed
+        lazily. Each outcome is ``(result, None)`` or ``(None, exception)``.
+        """
+        max_in_flight = max_in_flight or max(1, self.workers)
+        in_flight = deque()
+
+        def outcome(future):
+            try:
+                return self.result(future), None
+            except Exception as e:
+                return None, e
+
+        for args in arguments:
+            while True:
+                if len(in_flight) < max_in_flight:
+                    try:
+                        in_flight.append(self.submit(fn, *args))
+                        break
+                    except RecognitionBusy:
+                        if not in_flight:
+                            # Interactive requests hold every slot; wait for one to free up
+                            time.sleep(0.05)
+                            continue
+                yield outcome(in_flight.popleft())
+        while in_flight:
+            yield outcome(in_flight.popleft())
+
+    def _retire(self, executor, kill=False):
+        # Drop a broken or stuck pool; the next submit starts a fresh one
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._timeouts = 0
+        if kill:
+            # Jobs still running on the killed workers fail with BrokenProcessPool,
+            # which frees their slots
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        if self._slots is not None:
+            self._slots.release()
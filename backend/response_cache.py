@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache of rendered response bodies, bounded by their total size.
+
+    Each entry has its own time-to-live, so answers about closed months can
+    outlive those about the current one. Keys should include the data
+    versions the body was computed from: a write then makes later lookups
+    miss instead of needing explicit invalidation. Bodies larger than an
+    eighth of ``max_bytes`` are not stored; ``max_bytes=0`` disables the cache.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body, ttl_seconds):
+        if len(body) > self.max_entry_bytes or ttl_seconds <= 0:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl_seconds, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        _, body = self._entries.pop(key)
+        self._size -= len(body)
+
+    def capture(self, key, chunks, ttl_seconds):
+        """Yield ``chunks`` (bytes) unchanged and store their concatenation once all have been sent.
+
+        Lets a streamed response fill the cache without being buffered first;
+        collection stops as soon as the body outgrows what could be stored.
+        """
+        collected, size = [], 0
+        for chunk in chunks:
+            if collected is not None:
+                size += len(chunk)
+                if size > self.max_entry_bytes:
+                    collected = None
+                else:
+                    collected.append(chunk)
+            yield chunk
+        if collected is not None:
+            self.set(key, b''.join(collected), ttl_seconds)
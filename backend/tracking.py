@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import Counter, deque
+
+
+def box_iou(a, b):
+    """Intersection-over-union of two ``(top, right, bottom, left)`` boxes."""
+    top, right = max(a[0], b[0]), min(a[1], b[1])
+    bottom, left = min(a[2], b[2]), max(a[3], b[3])
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if not intersection:
+        return 0.0
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+
+class Track:
+    """A face followed across frames of one kiosk session."""
+
+    def __init__(self, box, window):
+        self.box = box
+        self.votes = deque(maxlen=window)
+        self.user_id = None
+        self.distance = None
+        self.frames_since_encode = 0
+        self.missed = 0
+        # Attendance outcome once the identity is confirmed, so later frames skip the database
+        self.status = None
+        self.user = None
+
+    def vote(self, user_id, distance):
+        self.votes.append(user_id)
+        self.distance = distance
+        self.frames_since_encode = 0
+
+
+class FaceTracker:
+    """Follows faces between frames and smooths their identity over a short window.
+
+    Boxes are associated with existing tracks by IoU. A track whose identity
+    is confirmed and whose last match was confident is not re-encoded for up
+    to ``reencode_every`` frames; everything else is encoded and adds a vote.
+    An identity is only confirmed once it holds the majority of the last
+    ``window`` votes with at least ``min_votes`` of them, which suppresses
+    one-frame false matches.
+    """
+
+    def __init__(self, window=5, min_votes=2, reencode_every=5, reuse_distance=0.45,
+                 iou_threshold=0.3, max_missed=2):
+        self.window = window
+        self.min_votes = min_votes
+        self.reencode_every = reencode_every
+        self.reuse_distance = reuse_distance
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = []
+        self.lock = threading.Lock()
+
+    def reusable_boxes(self):
+        """Boxes whose identity can be carried over without encoding this frame."""
+        return [track.box for track in self.tracks if self._reusable(track)]
+
+    def update(self, locations, encodings, match):
+        """Fold one frame into the tracks and return ``(track, reused)`` per detected face.
+
+        ``encodings[i]`` is ``None`` for faces that were not encoded this frame.
+        ``match`` maps a list of encodings to ``(user_id, distance)`` pairs.
+        """
+        assigned = self._associate(locations)
+
+        to_match = [i for i, encoding in enumerate(encodings) if encoding is not None]
+        matches = match([encodings[i] for i in to_match]) if to_match else []
+        matched = dict(zip(to_match, matches))
+
+        results = []
+        for i, location in enumerate(locations):
+            track = assigned.get(i)
+            reused = i not in matched and track is not None and self._reusable(track)
+            if track is None:
+                track = Track(location, self.window)
+                self.tracks.append(track)
+            track.box = location
+            track.missed = 0
+            if i in matched:
+                track.vote(*matched[i])
+                self._settle(track)
+            elif reused:
+                track.frames_since_encode += 1
+            results.append((track, reused))
+
+        seen = {id(track) for track, _ in results}
+        for track in self.tracks:
+            if id(track) not in seen:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return results
+
+    def state(self, track):
+        """'confirmed', 'unknown' (consistently unmatched) or 'pending'."""
+        if track.user_id is not None:
+            return 'confirmed'
+        if track.votes:
+            user_id, count = Counter(track.votes).most_common(1)[0]
+            if user_id is None and count >= self.min_votes:
+                return 'unknown'
+        return 'pending'
+
+    def _reusable(self, track):
+        return (track.user_id is not None and track.distance is not None
+                and track.distance < self.reuse_distance
+                and track.frames_since_encode < self.reencode_every)
+
+    def _associate(self, locations):
+        # Greedy IoU matching, best overlaps first
+        pairs = sorted(
+            ((box_iou(location, track.box), i, t) for i, location in enumerate(locations)
+             for t, track in enumerate(self.tracks)),
+            reverse=True
+        )
+        assigned, used = {}, set()
+        for iou, i, t in pairs:
+            if iou < self.iou_threshold:
+                break
+            if i in assigned or t in used:
+                continue
+            assigned[i] = self.tracks[t]
+            used.add(t)
+        return assigned
+
+    def _settle(self, track):
+        user_id, count = Counter(track.votes).most_common(1)[0]
+        confirmed = user_id if user_id is not None and count >= self.min_votes and count * 2 > len(track.votes) else None
+        if confirmed != track.user_id:
+            track.user_id = confirmed
+            track.status = None
+            track.user = None
+
+
+class SessionStore:
+    """Per-process map of kiosk session id to :class:`FaceTracker`, expiring idle sessions."""
+
+    def __init__(self, factory, ttl_seconds=60, max_sessions=1000):
+        self.factory = factory
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                if len(self._sessions) >= self.max_sessions:
+                    oldest = min(self._sessions, key=lambda key: self._sessions[key][1])
+                    del self._sessions[oldest]
+                entry = [self.factory(), now]
+                self._sessions[session_id] = entry
+            entry[1] = now
+            return entry[0]
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _expire(self, now):
+        expired = [key for key, (_, last_used) in self._sessions.items() if now - last_used > self.ttl_seconds]
+        for key in expired:
+            del self._sessions[key]
@@ -2,7 +2,7 @@ import React, { useState, useEffect, useRef, useCallback } from "react";
 import Webcam from "react-webcam";
 import {
   registerUser,
-  markAttendance,
+  markAttendanceSession,
   getUsers,
   getAttendanceRecords,
   queryChatbot,
@@ -433,6 +433,8 @@ function AttendanceMarking() {
   const [faceDetected, setFaceDetected] = useState(false);
   const [recognizedUsersStatus, setRecognizedUsersStatus] = useState({}); // To store status for multiple users
   const [markedUsersToday, setMarkedUsersToday] = useState(new Set()); // Track users marked today
+  // Lets the backend track faces across frames and skip re-recognizing them
+  const sessionIdRef = useRef(Math.random().toString(36).slice(2));
 
   const processFrame = useCallback(async () => {
     if (webcamRef.current) {
@@ -450,11 +452,11 @@ function AttendanceMarking() {
           canvasRef.current.height
         );
 
-        // First, detect faces to draw rectangles
-        const detectResult = await detectFace(imageSrc);
-        if (detectResult.faces && detectResult.faces.length > 0) {
+        // One request detects, tracks and recognizes the faces in this frame
+        const markResult = await markAttendanceSession(sessionIdRef.current, imageSrc);
+        if (markResult.faces && markResult.faces.length > 0) {
           setFaceDetected(true);
-          detectResult.faces.forEach((face) => {
+          markResult.faces.forEach((face) => {
             context.beginPath();
             context.rect(face.x, face.y, face.width, face.height);
             context.lineWidth = 2;
@@ -462,8 +464,6 @@ function AttendanceMarking() {
             context.stroke();
           });
 
-          // Then, attempt to mark attendance for each detected face
-          const markResult = await markAttendance(imageSrc); // Backend will handle recognition
           if (markResult.user) {
             const userId = markResult.user.id;
             const userName = markResult.user.name;
@@ -572,15 +572,16 @@ function AdminDashboard() {
 
   const fetchData = async () => {
     setMessage("Fetching data...");
+    const today = new Date().toISOString().slice(0, 10);
     const usersResult = await getUsers();
-    const attendanceResult = await getAttendanceRecords();
+    // Only today's records are needed for the Present/Absent column
+    const attendanceResult = await getAttendanceRecords({ from: today, to: today });
 
     if (usersResult.error || attendanceResult.error) {
       setMessage(
         `Error fetching data: ${usersResult.error || attendanceResult.error}`
       );
     } else {
-      const today = new Date().toISOString().slice(0, 10);
       const todaysAttendanceUserIds = new Set(
         attendanceResult
           .filter((record) => record.timestamp.slice(0, 10) === today)
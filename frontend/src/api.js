@@ -32,6 +32,38 @@ export const markAttendance = async (facialData) => {
     }
 };
 
+export const markAttendanceSession = async (sessionId, facialData) => {
+    try {
+        const response = await fetch(`${API_BASE_URL}/mark_attendance/session`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ session_id: sessionId, facial_data: facialData }),
+        });
+        return await response.json();
+    } catch (error) {
+        console.error("Error marking attendance:", error);
+        return { error: "Failed to mark attendance" };
+    }
+};
+
+export const markAttendanceBatch = async (images) => {
+    try {
+        const response = await fetch(`${API_BASE_URL}/mark_attendance/batch`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ images }),
+        });
+        return await response.json();
+    } catch (error) {
+        console.error("Error marking batch attendance:", error);
+        return { error: "Failed to mark batch attendance" };
+    }
+};
+
 export const getUsers = async () => {
     try {
         const response = await fetch(`${API_BASE_URL}/users`);
@@ -42,9 +74,15 @@ export const getUsers = async () => {
     }
 };
 
-export const getAttendanceRecords = async () => {
+export const getAttendanceRecords = async (filters = {}) => {
     try {
-        const response = await fetch(`${API_BASE_URL}/attendance`);
+        const url = new URL(`${API_BASE_URL}/attendance`);
+        Object.entries(filters).forEach(([key, value]) => {
+            if (value !== undefined && value !== null && value !== '') {
+                url.searchParams.append(key, value);
+            }
+        });
+        const response = await fetch(url);
         return await response.json();
     } catch (error) {
         console.error("Error fetching attendance records:", error);